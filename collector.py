@@ -8,45 +8,163 @@ Author: Kirill-Miroshnichenko
 License: MIT
 """
 
+import asyncio
+import contextlib
+import httpx
+from aiolimiter import AsyncLimiter
+import orjson
+import websockets
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import shutil
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 import pyarrow as pa
+from pyarrow.fs import LocalFileSystem
+
+
+# Repeated string columns, stored dictionary-encoded
+DICTIONARY_COLUMNS = ['instrument_name', 'option_type', 'underlying_index']
+_DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+
+# Column types of collected data, declared once for ingest and storage.
+# float32 covers the precision Deribit returns at half the size of float64.
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('us')),
+    ('instrument_name', _DICT_STRING),
+    ('expiration_timestamp', pa.timestamp('ms')),
+    ('strike', pa.float32()),
+    ('option_type', _DICT_STRING),
+    
+    # Prices
+    ('mark_price', pa.float32()),
+    ('last_price', pa.float32()),
+    ('bid_price', pa.float32()),
+    ('ask_price', pa.float32()),
+    ('mid_price', pa.float32()),
+    
+    # Greeks
+    ('delta', pa.float32()),
+    ('gamma', pa.float32()),
+    ('vega', pa.float32()),
+    ('theta', pa.float32()),
+    ('rho', pa.float32()),
+    
+    # Volatility
+    ('mark_iv', pa.float32()),
+    ('bid_iv', pa.float32()),
+    ('ask_iv', pa.float32()),
+    
+    # Volume
+    ('open_interest', pa.float32()),
+    ('volume_24h', pa.float32()),
+    
+    # Underlying
+    ('underlying_price', pa.float32()),
+    ('underlying_index', _DICT_STRING),
+])
+
+
+# Timeout in seconds for each REST request
+REQUEST_TIMEOUT = 10
+
+# Directory layout of saved data: currency=<CUR>/date=<YYYYMMDD>/
+PARTITIONING = ds.partitioning(
+    pa.schema([('currency', pa.string()), ('date', pa.string())]),
+    flavor='hive'
+)
 
 
 class DeribitDataCollector:
     """Class for collecting options data from Deribit"""
     
-    def __init__(self, currency='BTC', data_dir='deribit_data'):
+    def __init__(self, currency='BTC', data_dir='deribit_data', max_concurrency=20,
+                 greeks_for='liquid', rate_limit=20):
         """
         Initialize the collector
         
         Args:
             currency (str): 'BTC' or 'ETH'
             data_dir (str): directory for storing data
+            max_concurrency (int): max simultaneous orderbook requests
+            greeks_for (str): options to fetch greeks and bid/ask IV for -
+                'liquid' (non-zero open interest), 'all' or 'none'
+            rate_limit (float): max orderbook requests per second
         """
+        if greeks_for not in ('liquid', 'all', 'none'):
+            raise ValueError(f"greeks_for must be 'liquid', 'all' or 'none', got {greeks_for!r}")
+        
         self.base_url = 'https://www.deribit.com/api/v2/public'
+        self.ws_url = 'wss://www.deribit.com/ws/api/v2'
         self.currency = currency
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.greeks_for = greeks_for
+        
+        # One pooled session so REST calls reuse the TCP/TLS connection
+        retry = Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        
+        # Instrument lists by (kind, expired): (valid until, instruments)
+        self._instruments_cache = {}
+        
+        # Snapshots waiting for flush() and their collection day
+        self._pending = []
+        self._pending_date = None
+        
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
         print(f"Initialized collector for {currency}")
         print(f"Data directory: {self.data_dir.absolute()}")
     
-    def get_instruments(self, kind='option', expired=False):
+    @staticmethod
+    def _next_rollover(now):
+        """
+        Get next daily expiry rollover (08:00 UTC)
+        
+        Args:
+            now (datetime): current UTC time
+            
+        Returns:
+            datetime: rollover time
+        """
+        rollover = now.replace(hour=8, minute=0, second=0, microsecond=0)
+        if now >= rollover:
+            rollover += timedelta(days=1)
+        return rollover
+    
+    def get_instruments(self, kind='option', expired=False, refresh=False):
         """
         Get list of all instruments
         
+        The list only changes when options expire or get listed, so it
+        is cached until the next 08:00 UTC rollover.
+        
         Args:
             kind (str): instrument type ('option', 'future')
             expired (bool): include expired instruments
+            refresh (bool): ignore cached list
             
         Returns:
             list: list of instruments
         """
+        key = (kind, expired)
+        now = datetime.now(timezone.utc)
+        
+        if not refresh and key in self._instruments_cache:
+            valid_until, instruments = self._instruments_cache[key]
+            if now < valid_until:
+                return instruments
+        
         url = f'{self.base_url}/get_instruments'
         params = {
             'currency': self.currency,
@@ -55,18 +173,46 @@ class DeribitDataCollector:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()['result']
+            instruments = orjson.loads(response.content)['result']
         except Exception as e:
             print(f"Error fetching instruments: {e}")
             return []
+        
+        self._instruments_cache[key] = (self._next_rollover(now), instruments)
+        return instruments
+    
+    def get_book_summary(self, kind='option'):
+        """
+        Get market summary for all instruments in one request
+        
+        Args:
+            kind (str): instrument type ('option', 'future')
+            
+        Returns:
+            list: book summaries (mark price, mark IV, OI, volume, bid/ask)
+        """
+        url = f'{self.base_url}/get_book_summary_by_currency'
+        params = {
+            'currency': self.currency,
+            'kind': kind
+        }
+        
+        try:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return orjson.loads(response.content)['result']
+        except Exception as e:
+            print(f"Error fetching book summary: {e}")
+            return []
     
-    def get_orderbook(self, instrument_name):
+    async def get_orderbook(self, client, instrument_name):
         """
         Get orderbook for instrument
         
         Args:
+            client (httpx.AsyncClient): shared HTTP client
             instrument_name (str): instrument name
             
         Returns:
@@ -76,170 +222,685 @@ class DeribitDataCollector:
         params = {'instrument_name': instrument_name}
         
         try:
-            response = requests.get(url, params=params)
+            response = await client.get(url, params=params)
             response.raise_for_status()
-            return response.json()['result']
+            return orjson.loads(response.content)['result']
         except Exception as e:
             print(f"Error for {instrument_name}: {e}")
             return None
     
-    def collect_options_data(self):
+    async def _iter_orderbooks(self, instrument_names):
         """
-        Collect data for all options
+        Fetch orderbooks for instruments concurrently
+        
+        Args:
+            instrument_names (list): instrument names
+            
+        Yields:
+            tuple: (instrument_name, orderbook or None) as each response completes
+        """
+        # Token bucket keeps us within Deribit's rate limit (bursts up to
+        # rate_limit), semaphore bounds requests in flight, HTTP/2
+        # multiplexes them over a single connection
+        limiter = AsyncLimiter(self.rate_limit, time_period=1.0)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+            keepalive_expiry=30
+        )
         
+        async with httpx.AsyncClient(http2=True, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+            async def bounded_fetch(instrument_name):
+                async with semaphore, limiter:
+                    return instrument_name, await self.get_orderbook(client, instrument_name)
+            
+            tasks = [bounded_fetch(n) for n in instrument_names]
+            for processed, task in enumerate(asyncio.as_completed(tasks), 1):
+                yield await task
+                
+                if processed % 100 == 0:
+                    print(f"Processed: {processed}/{len(instrument_names)}")
+    
+    def _greeks_shortlist(self, summaries):
+        """
+        Select options that get a full orderbook request
+        
+        Args:
+            summaries (list): book summaries from get_book_summary()
+            
         Returns:
-            pd.DataFrame: DataFrame with collected data
+            list: instrument names
+        """
+        if self.greeks_for == 'all':
+            return [s['instrument_name'] for s in summaries]
+        if self.greeks_for == 'liquid':
+            return [s['instrument_name'] for s in summaries if s.get('open_interest')]
+        return []
+    
+    @staticmethod
+    def _build_record(timestamp, instrument, summary, orderbook):
+        """
+        Build one output row
+        
+        Args:
+            timestamp (datetime): collection time
+            instrument (dict): entry from get_instruments()
+            summary (dict): entry from get_book_summary()
+            orderbook (dict): orderbook data (empty if not fetched)
+            
+        Returns:
+            dict: record
+        """
+        greeks = orderbook.get('greeks', {})
+        
+        return {
+            'timestamp': timestamp,
+            'instrument_name': summary['instrument_name'],
+            'expiration_timestamp': instrument['expiration_timestamp'],
+            'strike': instrument['strike'],
+            'option_type': instrument['option_type'],
+            
+            # Prices
+            'mark_price': summary.get('mark_price'),
+            'last_price': summary.get('last'),
+            'bid_price': summary.get('bid_price') or None,
+            'ask_price': summary.get('ask_price') or None,
+            
+            # Greeks (only for options in the orderbook shortlist)
+            'delta': greeks.get('delta'),
+            'gamma': greeks.get('gamma'),
+            'vega': greeks.get('vega'),
+            'theta': greeks.get('theta'),
+            'rho': greeks.get('rho'),
+            
+            # Volatility
+            'mark_iv': summary.get('mark_iv'),
+            'bid_iv': orderbook.get('bid_iv'),
+            'ask_iv': orderbook.get('ask_iv'),
+            
+            # Volume
+            'open_interest': summary.get('open_interest'),
+            'volume_24h': summary.get('volume'),
+            
+            # Underlying
+            'underlying_price': summary.get('underlying_price'),
+            'underlying_index': summary.get('underlying_index')
+        }
+    
+    def _get_market_snapshot(self):
+        """
+        Get all options and their market summary
+        
+        Returns:
+            tuple: (dict of instruments by name, list of book summaries)
+        """
+        summaries = self.get_book_summary()
+        instruments = {i['instrument_name']: i for i in self.get_instruments()}
+        
+        # Unknown names mean new listings since the cached list. If the
+        # refresh fails, keep the cached list rather than dropping everything
+        if any(s['instrument_name'] not in instruments for s in summaries):
+            refreshed = self.get_instruments(refresh=True)
+            if refreshed:
+                instruments = {i['instrument_name']: i for i in refreshed}
+        
+        summaries = [s for s in summaries if s['instrument_name'] in instruments]
+        print(f"Found instruments: {len(summaries)}")
+        
+        return instruments, summaries
+    
+    @staticmethod
+    def _to_table(records):
+        """
+        Convert records to a table and compute derived columns
+        
+        Args:
+            records (list): records from _build_record()
+            
+        Returns:
+            pa.Table: records with SCHEMA
+        """
+        table = pa.Table.from_pylist(records, schema=SCHEMA)
+        
+        # Null on either side gives a null mid price
+        mid_price = pc.multiply(pc.add(table['bid_price'], table['ask_price']), 0.5)
+        index = SCHEMA.get_field_index('mid_price')
+        
+        return table.set_column(index, SCHEMA.field(index), mid_price.cast(pa.float32()))
+    
+    async def _iter_batches(self, timestamp, instruments, summaries, batch_size):
+        """
+        Build records as data arrives, in tables of at most batch_size rows
+        
+        Options outside the greeks shortlist are complete right away,
+        the rest as their orderbook responses come in.
+        
+        Args:
+            timestamp (datetime): collection time of the snapshot
+            instruments (dict): instruments by name
+            summaries (list): book summaries
+            batch_size (int): max rows per table
+            
+        Yields:
+            pa.Table: records with SCHEMA
+        """
+        shortlist = self._greeks_shortlist(summaries)
+        shortlisted = set(shortlist)
+        summary_by_name = {s['instrument_name']: s for s in summaries}
+        batch = []
+        
+        def add(summary, orderbook):
+            instrument = instruments[summary['instrument_name']]
+            batch.append(self._build_record(timestamp, instrument, summary, orderbook or {}))
+            return len(batch) >= batch_size
+        
+        for summary in summaries:
+            if summary['instrument_name'] not in shortlisted and add(summary, None):
+                yield self._to_table(batch)
+                batch = []
+        
+        # Get orderbook data (contains greeks) for the shortlist
+        if shortlist:
+            print(f"Fetching greeks for: {len(shortlist)}")
+        
+        async for instrument_name, orderbook in self._iter_orderbooks(shortlist):
+            if add(summary_by_name[instrument_name], orderbook):
+                yield self._to_table(batch)
+                batch = []
+        
+        if batch:
+            yield self._to_table(batch)
+    
+    def collect_options_table(self, batch_size=500):
+        """
+        Collect data for all options as an Arrow table
+        
+        Prices, mark IV, OI and volume come from a single book summary
+        request. Greeks and bid/ask IV are only available per orderbook,
+        so they are fetched for the options selected by greeks_for.
+        
+        Args:
+            batch_size (int): rows per record batch
+            
+        Returns:
+            pa.Table: collected data with SCHEMA
         """
         print(f"Starting data collection for {self.currency}...")
         
-        # Get list of all options
-        instruments = self.get_instruments()
-        print(f"Found instruments: {len(instruments)}")
+        timestamp = datetime.now()
+        instruments, summaries = self._get_market_snapshot()
         
-        data = []
+        async def collect():
+            return [t async for t in self._iter_batches(timestamp, instruments, summaries, batch_size)]
         
-        for idx, instrument in enumerate(instruments):
-            instrument_name = instrument['instrument_name']
+        table = pa.concat_tables(asyncio.run(collect()) or [SCHEMA.empty_table()])
+        print(f"\nDone! Collected records: {table.num_rows}")
+        
+        return table
+    
+    def collect_and_save(self, batch_size=500):
+        """
+        Collect data for all options, streaming it into a new part file
+        
+        Records are written every batch_size rows as responses arrive,
+        so memory stays bounded by one batch.
+        
+        Args:
+            batch_size (int): rows per row group
             
-            # Get orderbook data (contains greeks and prices)
-            orderbook = self.get_orderbook(instrument_name)
+        Returns:
+            Path: path to saved file
+        """
+        print(f"Starting data collection for {self.currency}...")
+        
+        timestamp = datetime.now()
+        instruments, summaries = self._get_market_snapshot()
+        
+        if not summaries:
+            print("No data to save")
+            return None
+        
+        # Partition by the snapshot's collection time, like save_to_parquet
+        filename = self._new_part_filename(timestamp)
+        
+        async def stream():
+            rows = 0
+            with self._open_writer(filename) as writer:
+                async for table in self._iter_batches(timestamp, instruments, summaries, batch_size):
+                    writer.write_table(table)
+                    rows += table.num_rows
+            return rows
+        
+        rows = asyncio.run(stream())
+        print(f"\nDone! Saved {rows} records: {filename}")
+        
+        return filename
+    
+    @staticmethod
+    def _ticker_as_summary(ticker):
+        """
+        Map ticker fields to book summary names used by _build_record()
+        
+        Args:
+            ticker (dict): ticker notification data
             
-            if orderbook:
-                record = {
-                    'timestamp': datetime.now(),
-                    'instrument_name': instrument_name,
-                    'expiration_timestamp': instrument['expiration_timestamp'],
-                    'strike': instrument['strike'],
-                    'option_type': instrument['option_type'],
-                    
-                    # Prices
-                    'mark_price': orderbook.get('mark_price'),
-                    'last_price': orderbook.get('last_price'),
-                    'bid_price': orderbook['best_bid_price'] if orderbook.get('best_bid_price') else None,
-                    'ask_price': orderbook['best_ask_price'] if orderbook.get('best_ask_price') else None,
-                    'mid_price': (orderbook.get('best_bid_price', 0) + orderbook.get('best_ask_price', 0)) / 2 if orderbook.get('best_bid_price') and orderbook.get('best_ask_price') else None,
-                    
-                    # Greeks
-                    'delta': orderbook.get('greeks', {}).get('delta'),
-                    'gamma': orderbook.get('greeks', {}).get('gamma'),
-                    'vega': orderbook.get('greeks', {}).get('vega'),
-                    'theta': orderbook.get('greeks', {}).get('theta'),
-                    'rho': orderbook.get('greeks', {}).get('rho'),
-                    
-                    # Volatility
-                    'mark_iv': orderbook.get('mark_iv'),
-                    'bid_iv': orderbook.get('bid_iv'),
-                    'ask_iv': orderbook.get('ask_iv'),
+        Returns:
+            dict: summary-shaped ticker
+        """
+        return {
+            'instrument_name': ticker['instrument_name'],
+            'mark_price': ticker.get('mark_price'),
+            'last': ticker.get('last_price'),
+            'bid_price': ticker.get('best_bid_price'),
+            'ask_price': ticker.get('best_ask_price'),
+            'mark_iv': ticker.get('mark_iv'),
+            'open_interest': ticker.get('open_interest'),
+            'volume': ticker.get('stats', {}).get('volume'),
+            'underlying_price': ticker.get('underlying_price'),
+            'underlying_index': ticker.get('underlying_index')
+        }
+    
+    async def _stream_tickers(self, instrument_names, latest, interval='100ms'):
+        """
+        Keep latest ticker per instrument up to date, reconnecting on disconnects
+        
+        Runs until cancelled. Tickers from before a reconnect are
+        dropped, so snapshots never repeat stale data. Error replies to
+        subscribe requests raise RuntimeError.
+        
+        Args:
+            instrument_names (list): instruments to subscribe to
+            latest (dict): ticker data by instrument name, updated in place
+            interval (str): ticker channel interval ('100ms' or 'agg2')
+        """
+        channels = [f'ticker.{name}.{interval}' for name in instrument_names]
+        
+        while True:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    # Deribit accepts many channels per subscribe call
+                    for start in range(0, len(channels), 100):
+                        await ws.send(orjson.dumps({
+                            'jsonrpc': '2.0',
+                            'id': start,
+                            'method': 'public/subscribe',
+                            'params': {'channels': channels[start:start + 100]}
+                        }).decode())
                     
-                    # Volume
-                    'open_interest': orderbook.get('open_interest'),
-                    'volume_24h': orderbook.get('stats', {}).get('volume'),
+                    print(f"Subscribing to {len(channels)} tickers")
                     
-                    # Underlying
-                    'underlying_price': orderbook.get('underlying_price'),
-                    'underlying_index': orderbook.get('underlying_index')
-                }
+                    async for message in ws:
+                        msg = orjson.loads(message)
+                        if 'error' in msg:
+                            raise RuntimeError(f"Subscribe request {msg.get('id')} failed: {msg['error']}")
+                        if msg.get('method') == 'subscription':
+                            data = msg['params']['data']
+                            latest[data['instrument_name']] = data
                 
-                data.append(record)
+                print("WebSocket closed, reconnecting...")
+            except (websockets.WebSocketException, OSError) as e:
+                print(f"WebSocket disconnected: {e}, reconnecting...")
             
-            # Small delay to avoid rate limit
-            if (idx + 1) % 10 == 0:
-                print(f"Processed: {idx + 1}/{len(instruments)}")
-                time.sleep(0.5)
+            # Tickers from the closed connection are no longer current
+            latest.clear()
+            await asyncio.sleep(1)
+    
+    async def stream_to_parquet(self, snapshot_minutes=5, iterations=12, interval='100ms'):
+        """
+        Collect data from WebSocket ticker subscriptions
+        
+        Deribit pushes ticker updates (prices, greeks, IV, OI) for every
+        subscribed option, so nothing is re-polled. Every snapshot_minutes
+        the latest state of all options is saved as a new part file.
         
-        df = pd.DataFrame(data)
-        print(f"\nDone! Collected records: {len(df)}")
+        Args:
+            snapshot_minutes (float): interval between saved snapshots
+            iterations (int): number of snapshots
+            interval (str): ticker channel interval ('100ms' or 'agg2')
+        """
+        latest = {}
+        instruments = {}
+        stream = None
         
-        return df
+        try:
+            for i in range(iterations):
+                # Resubscribe when options get listed or expire
+                # REST call runs in a worker thread so the ticker reader
+                # and websocket keepalive are not blocked meanwhile
+                listed = await asyncio.get_running_loop().run_in_executor(None, self.get_instruments)
+                current = {inst['instrument_name']: inst for inst in listed}
+                if current and current.keys() != instruments.keys():
+                    if stream:
+                        stream.cancel()
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await stream
+                    
+                    instruments = current
+                    latest.clear()
+                    stream = asyncio.create_task(
+                        self._stream_tickers(list(instruments), latest, interval)
+                    )
+                
+                if stream is None:
+                    print("No instruments to subscribe to, retrying...")
+                    await asyncio.sleep(snapshot_minutes * 60)
+                    continue
+                
+                # Wake up early if the stream task dies, and re-raise its error
+                await asyncio.wait({stream}, timeout=snapshot_minutes * 60)
+                if stream.done():
+                    stream.result()
+                
+                print(f"\n{'='*50}")
+                print(f"Snapshot {i+1}/{iterations} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"{'='*50}")
+                
+                timestamp = datetime.now()
+                records = [
+                    self._build_record(timestamp, instruments[name], self._ticker_as_summary(ticker), ticker)
+                    for name, ticker in latest.items()
+                    if name in instruments
+                ]
+                self.save_to_parquet(self._to_table(records))
+        finally:
+            if stream and not stream.done():
+                stream.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await stream
+    
+    def collect_options_data(self):
+        """
+        Collect data for all options
+        
+        Returns:
+            pd.DataFrame: DataFrame with collected data
+        """
+        return self.collect_options_table().to_pandas()
     
     def get_daily_filename(self, date=None):
         """
-        Get filename for specific date
+        Get partition directory for specific date
+        
+        Data is laid out as currency=<CUR>/date=<YYYYMMDD>/part-*.parquet
+        (Hive partitioning). Each save writes a separate part file, so
+        existing data for the day is never re-read or rewritten.
         
         Args:
             date (datetime): date (default today)
             
         Returns:
-            Path: file path
+            Path: directory path
         """
         if date is None:
             date = datetime.now()
         
         date_str = date.strftime('%Y%m%d')
-        return self.data_dir / f'{self.currency}_options_{date_str}.parquet'
+        return self.data_dir / f'currency={self.currency}' / f'date={date_str}'
     
-    def save_to_parquet(self, df):
+    def _new_part_filename(self, date):
         """
-        Save data to Parquet (append to current day file)
+        Get path for a new part file in a day directory
         
         Args:
-            df (pd.DataFrame): data to save
+            date (datetime): collection day of the data
             
         Returns:
-            Path: path to saved file
+            Path: file path
         """
-        if df.empty:
+        now = datetime.now()
+        day_dir = self.get_daily_filename(date)
+        day_dir.mkdir(parents=True, exist_ok=True)
+        
+        return day_dir / f'part-{now.strftime("%Y%m%d%H%M%S%f")}.parquet'
+    
+    @staticmethod
+    def _open_writer(filename):
+        """
+        Open Parquet writer with the storage settings
+        
+        Args:
+            filename (Path): file path
+            
+        Returns:
+            pq.ParquetWriter: writer for SCHEMA
+        """
+        return pq.ParquetWriter(
+            filename, SCHEMA,
+            compression='zstd',
+            compression_level=3,
+            use_dictionary=DICTIONARY_COLUMNS,
+            data_page_size=1 << 20
+        )
+    
+    @staticmethod
+    def _as_table(data):
+        """
+        Convert DataFrame to an Arrow table with SCHEMA
+        
+        Args:
+            data (pa.Table or pd.DataFrame): data
+            
+        Returns:
+            pa.Table: table
+            
+        Raises:
+            ValueError: if the DataFrame is missing SCHEMA columns
+        """
+        if isinstance(data, pd.DataFrame):
+            missing = [name for name in SCHEMA.names if name not in data.columns]
+            if missing:
+                raise ValueError(f"DataFrame does not match SCHEMA, missing columns: {missing}")
+            return pa.Table.from_pandas(data, schema=SCHEMA, preserve_index=False)
+        return data
+    
+    @staticmethod
+    def _split_by_day(table):
+        """
+        Split table by the collection day of its rows
+        
+        Args:
+            table (pa.Table): data with SCHEMA
+            
+        Returns:
+            list: (day, table) pairs, day as datetime at midnight
+        """
+        days = pc.fill_null(
+            pc.strftime(table['timestamp'], format='%Y%m%d'),
+            datetime.now().strftime('%Y%m%d')
+        )
+        
+        return [
+            (datetime.strptime(day, '%Y%m%d'), table.filter(pc.equal(days, day)))
+            for day in sorted(pc.unique(days).to_pylist())
+        ]
+    
+    def save_to_parquet(self, data):
+        """
+        Save data to Parquet (new part file in day directory)
+        
+        The day directory is taken from the rows' collection timestamp,
+        so a snapshot taken before midnight and saved after it stays in
+        its own day.
+        
+        Args:
+            data (pa.Table or pd.DataFrame): data to save
+            
+        Returns:
+            Path: path to saved file (the last one if data spans several days)
+        """
+        if len(data) == 0:
             print("No data to save")
             return None
         
-        filename = self.get_daily_filename()
+        data = self._as_table(data)
         
-        # If file for today exists - append
-        if filename.exists():
-            existing_df = pd.read_parquet(filename)
-            df = pd.concat([existing_df, df], ignore_index=True)
-            print(f"Appended to existing file: {filename}")
-        else:
-            print(f"Created new file: {filename}")
-        
-        # Save with compression
-        df.to_parquet(filename, compression='snappy', index=False)
-        print(f"Total records in file: {len(df)}")
+        for day, day_data in self._split_by_day(data):
+            filename = self._new_part_filename(day)
+            
+            with self._open_writer(filename) as writer:
+                writer.write_table(day_data)
+            print(f"Saved {day_data.num_rows} records: {filename}")
         
         return filename
     
-    def load_data(self, start_date=None, end_date=None):
+    def buffer(self, data):
+        """
+        Add data to the pending buffer, written by flush()
+        
+        Buffered snapshots are written together as one part file, so
+        short collection intervals do not produce many small files.
+        A buffer holding snapshots from an earlier collection day is
+        flushed first.
+        
+        Args:
+            data (pa.Table or pd.DataFrame): data to buffer
+        """
+        if len(data) == 0:
+            return
+        
+        table = self._as_table(data)
+        
+        # Day of the snapshot's own collection time, not of this call
+        collected = pc.max(table['timestamp']).as_py() or datetime.now()
+        day = collected.date()
+        
+        if self._pending and self._pending_date != day:
+            self.flush()
+        
+        self._pending.append(table)
+        self._pending_date = day
+    
+    def flush(self):
+        """
+        Write buffered data as one part file
+        
+        Returns:
+            Path: path to saved file (None if nothing was buffered)
+        """
+        if not self._pending:
+            return None
+        
+        # Arrow concatenation only links the chunks, nothing is copied
+        table = pa.concat_tables(self._pending)
+        self._pending = []
+        self._pending_date = None
+        
+        return self.save_to_parquet(table)
+    
+    def _legacy_paths(self):
+        """
+        Find data saved in earlier layouts
+        
+        Returns:
+            list: <CUR>_options_YYYYMMDD.parquet files and
+                <CUR>_options_YYYYMMDD/ directories
+        """
+        return sorted(self.data_dir.glob(f'{self.currency}_options_*'))
+    
+    def migrate_legacy_data(self):
+        """
+        Move data saved in earlier layouts into the partitioned layout
+        
+        Each legacy day file or directory is converted to SCHEMA and
+        written into the date partition of its rows, then removed.
+        
+        Returns:
+            int: number of migrated records
+        """
+        total = 0
+        
+        for path in self._legacy_paths():
+            try:
+                datetime.strptime(path.name.split('.')[0].split('_')[-1], '%Y%m%d')
+            except ValueError:
+                print(f"Skipped (no date in name): {path.name}")
+                continue
+            
+            df = pd.read_parquet(path)
+            self.save_to_parquet(df)
+            total += len(df)
+            
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+            print(f"Migrated: {path.name} ({len(df)} records)")
+        
+        return total
+    
+    def load_data(self, start_date=None, end_date=None, columns=None):
         """
         Load data for period
         
+        Partition directories outside the currency and period are pruned
+        without opening their files, the remaining rows are filtered by
+        collection timestamp during the scan. An end_date at midnight
+        (or a plain date) includes that whole day.
+        
         Args:
-            start_date (datetime): start of period (None = all files)
-            end_date (datetime): end of period (None = all files)
+            start_date (datetime or date): start of period (None = all files)
+            end_date (datetime or date): end of period (None = all files)
+            columns (list): columns to read (None = all columns)
             
         Returns:
             pd.DataFrame: combined data
         """
-        files = sorted(self.data_dir.glob(f'{self.currency}_options_*.parquet'))
+        midnight = datetime.min.time()
+        if start_date and not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, midnight)
+        if end_date and not isinstance(end_date, datetime):
+            end_date = datetime.combine(end_date, midnight)
         
-        if not files:
+        timestamp = ds.field('timestamp')
+        expr = ds.field('currency') == self.currency
+        if start_date:
+            expr &= ds.field('date') >= start_date.strftime('%Y%m%d')
+            expr &= timestamp >= pa.scalar(start_date, type=pa.timestamp('us'))
+        if end_date:
+            expr &= ds.field('date') <= end_date.strftime('%Y%m%d')
+            if end_date.time() == midnight:
+                next_day = end_date + timedelta(days=1)
+                expr &= timestamp < pa.scalar(next_day, type=pa.timestamp('us'))
+            else:
+                expr &= timestamp <= pa.scalar(end_date, type=pa.timestamp('us'))
+        
+        legacy = self._legacy_paths()
+        if legacy:
+            print(f"Warning: {len(legacy)} day(s) of {self.currency} data in the old layout "
+                  f"are not loaded, run migrate_legacy_data() to convert them")
+        
+        currency_dir = self.data_dir / f'currency={self.currency}'
+        if not currency_dir.is_dir():
             print("No saved data found")
             return pd.DataFrame()
         
-        dfs = []
-        
-        for file in files:
-            # Filter by dates if needed
-            if start_date or end_date:
-                file_date = datetime.strptime(file.stem.split('_')[-1], '%Y%m%d')
-                
-                if start_date and file_date < start_date:
-                    continue
-                if end_date and file_date > end_date:
-                    continue
-            
-            df = pd.read_parquet(file)
-            dfs.append(df)
-            print(f"Loaded: {file.name} ({len(df)} records)")
+        # Files are memory-mapped: pages are read straight from the
+        # mapping instead of being copied into a separate read buffer
+        dataset = ds.dataset(
+            str(currency_dir),
+            format='parquet',
+            partitioning=PARTITIONING,
+            partition_base_dir=str(self.data_dir),
+            schema=pa.unify_schemas([SCHEMA, PARTITIONING.schema]),
+            filesystem=LocalFileSystem(use_mmap=True)
+        )
         
-        if dfs:
-            result = pd.concat(dfs, ignore_index=True)
-            print(f"\nTotal loaded records: {len(result)}")
-            return result
-        else:
+        files = [f.path for f in dataset.get_fragments(filter=expr)]
+        if not files:
+            print("No saved data found")
             return pd.DataFrame()
+        
+        # Read and concatenate all files in one pass
+        table = dataset.to_table(columns=columns or SCHEMA.names, filter=expr, use_threads=True)
+        result = table.to_pandas(self_destruct=True, split_blocks=True)
+        print(f"Loaded files: {len(files)}")
+        print(f"\nTotal loaded records: {len(result)}")
+        
+        return result
 
 
-def periodic_collection(currency='BTC', interval_minutes=5, iterations=12):
+def periodic_collection(currency='BTC', interval_minutes=5, iterations=12, flush_every=1):
     """
     Collect data every N minutes and save to Parquet
     
@@ -247,20 +908,43 @@ def periodic_collection(currency='BTC', interval_minutes=5, iterations=12):
         currency (str): currency ('BTC', 'ETH')
         interval_minutes (int): collection interval in minutes
         iterations (int): number of iterations
+        flush_every (int): iterations per part file (1 = stream each
+            snapshot straight to disk)
     """
     collector = DeribitDataCollector(currency=currency)
     
-    for i in range(iterations):
-        print(f"\n{'='*50}")
-        print(f"Iteration {i+1}/{iterations} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'='*50}")
-        
-        df = collector.collect_options_data()
-        collector.save_to_parquet(df)
-        
-        if i < iterations - 1:
-            print(f"\nWaiting {interval_minutes} minutes...")
-            time.sleep(interval_minutes * 60)
+    # Buffered snapshots are written even if the run is interrupted
+    try:
+        for i in range(iterations):
+            print(f"\n{'='*50}")
+            print(f"Iteration {i+1}/{iterations} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"{'='*50}")
+            
+            if flush_every > 1:
+                collector.buffer(collector.collect_options_table())
+                if (i + 1) % flush_every == 0:
+                    collector.flush()
+            else:
+                collector.collect_and_save()
+            
+            if i < iterations - 1:
+                print(f"\nWaiting {interval_minutes} minutes...")
+                time.sleep(interval_minutes * 60)
+    finally:
+        collector.flush()
+
+
+def stream_collection(currency='BTC', snapshot_minutes=5, iterations=12):
+    """
+    Collect data over WebSocket and save a snapshot to Parquet every N minutes
+    
+    Args:
+        currency (str): currency ('BTC', 'ETH')
+        snapshot_minutes (float): snapshot interval in minutes
+        iterations (int): number of snapshots
+    """
+    collector = DeribitDataCollector(currency=currency)
+    asyncio.run(collector.stream_to_parquet(snapshot_minutes, iterations))
 
 
 # =============================================================================
@@ -286,18 +970,22 @@ if __name__ == "__main__":
     if not df.empty:
         print("\n=== Quick Statistics ===")
         print(f"Total options: {len(df)}")
-        print(f"Calls: {len(df[df['option_type'] == 'call'])}")
-        print(f"Puts: {len(df[df['option_type'] == 'put'])}")
+        type_counts = df['option_type'].value_counts()
+        print(f"Calls: {type_counts.get('call', 0)}")
+        print(f"Puts: {type_counts.get('put', 0)}")
         print(f"\nUnique expirations: {df['expiration_timestamp'].nunique()}")
         print(f"Unique strikes: {df['strike'].nunique()}")
         
         # Filter data - for example, only liquid options
-        df_liquid = df[
+        liquid = (
             (df['bid_price'].notna()) & 
             (df['ask_price'].notna()) &
             (df['open_interest'] > 0)
-        ]
-        print(f"\nLiquid options (with non-zero OI and spread): {len(df_liquid)}")
+        )
+        print(f"\nLiquid options (with non-zero OI and spread): {liquid.sum()}")
     
     # 4. To run periodic collection uncomment:
     # periodic_collection(currency='ETH', interval_minutes=2, iterations=10)
+    
+    # 5. Or stream updates over WebSocket and snapshot every 2 minutes:
+    # stream_collection(currency='ETH', snapshot_minutes=2, iterations=10)
@@ -4,22 +4,45 @@ Data Analysis Example
 Shows how to analyze and visualize collected options data
 """
 
+import os
 import sys
 sys.path.append('..')
 
-from collector import DeribitDataCollector
+from collector import DeribitDataCollector, DICTIONARY_COLUMNS
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def analyze_volatility_smile(df):
-    """Build volatility smile"""
+# Columns each analysis needs, so Parquet reads can skip the rest
+SMILE_COLUMNS = ['expiration_timestamp', 'underlying_price', 'strike', 'option_type', 'mark_iv']
+GREEKS_COLUMNS = ['delta', 'gamma', 'vega', 'theta']
+SUMMARY_COLUMNS = ['option_type', 'mark_iv', 'open_interest', 'volume_24h', 'strike']
+
+
+def load_columns(source, columns):
+    """Return DataFrame as is, or read only given columns from a Parquet path"""
+    
+    if isinstance(source, pd.DataFrame):
+        return source
+    
+    df = pd.read_parquet(source, columns=columns)
+    
+    # String columns as categoricals (already the case for dictionary-encoded files)
+    for col in DICTIONARY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('category')
     
-    # Convert expiration timestamp
-    df['expiration_date'] = pd.to_datetime(df['expiration_timestamp'], unit='ms')
+    return df
+
+
+def analyze_volatility_smile(source):
+    """Build volatility smile (source: DataFrame or Parquet path)"""
+    
+    df = load_columns(source, SMILE_COLUMNS)
     
-    # Take nearest expiration
-    nearest_exp = df['expiration_date'].min()
-    exp_data = df[df['expiration_date'] == nearest_exp].copy()
+    # Take nearest expiration (stored as a timestamp)
+    nearest_exp = df['expiration_timestamp'].min()
+    exp_data = df[df['expiration_timestamp'] == nearest_exp].copy()
     
     if len(exp_data) == 0:
         print("No data for analysis")
@@ -57,38 +80,27 @@ def analyze_volatility_smile(df):
     plt.show()
 
 
-def analyze_greeks_distribution(df):
-    """Analyze Greeks distribution"""
+def analyze_greeks_distribution(source):
+    """Analyze Greeks distribution (source: DataFrame or Parquet path)"""
+    
+    df = load_columns(source, GREEKS_COLUMNS)
     
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     
-    # Delta
-    axes[0, 0].hist(df['delta'].dropna(), bins=50, alpha=0.7, color='blue', edgecolor='black')
-    axes[0, 0].set_xlabel('Delta')
-    axes[0, 0].set_ylabel('Frequency')
-    axes[0, 0].set_title('Delta Distribution')
-    axes[0, 0].grid(True, alpha=0.3)
-    
-    # Gamma
-    axes[0, 1].hist(df['gamma'].dropna(), bins=50, alpha=0.7, color='green', edgecolor='black')
-    axes[0, 1].set_xlabel('Gamma')
-    axes[0, 1].set_ylabel('Frequency')
-    axes[0, 1].set_title('Gamma Distribution')
-    axes[0, 1].grid(True, alpha=0.3)
-    
-    # Vega
-    axes[1, 0].hist(df['vega'].dropna(), bins=50, alpha=0.7, color='orange', edgecolor='black')
-    axes[1, 0].set_xlabel('Vega')
-    axes[1, 0].set_ylabel('Frequency')
-    axes[1, 0].set_title('Vega Distribution')
-    axes[1, 0].grid(True, alpha=0.3)
-    
-    # Theta
-    axes[1, 1].hist(df['theta'].dropna(), bins=50, alpha=0.7, color='red', edgecolor='black')
-    axes[1, 1].set_xlabel('Theta')
-    axes[1, 1].set_ylabel('Frequency')
-    axes[1, 1].set_title('Theta Distribution')
-    axes[1, 1].grid(True, alpha=0.3)
+    # One numpy view for all Greeks, binned with np.histogram
+    values = df[GREEKS_COLUMNS].to_numpy()
+    colors = ['blue', 'green', 'orange', 'red']
+    
+    for i, (ax, col, color) in enumerate(zip(axes.flat, GREEKS_COLUMNS, colors)):
+        column = values[:, i]
+        counts, edges = np.histogram(column[~np.isnan(column)], bins=50)
+        
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+               alpha=0.7, color=color, edgecolor='black')
+        ax.set_xlabel(col.capitalize())
+        ax.set_ylabel('Frequency')
+        ax.set_title(f'{col.capitalize()} Distribution')
+        ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
     plt.savefig('greeks_distribution.png', dpi=300)
@@ -96,8 +108,10 @@ def analyze_greeks_distribution(df):
     plt.show()
 
 
-def print_summary_stats(df):
-    """Print summary statistics"""
+def print_summary_stats(source):
+    """Print summary statistics (source: DataFrame or Parquet path)"""
+    
+    df = load_columns(source, SUMMARY_COLUMNS)
     
     print(f"\n{'='*60}")
     print("SUMMARY STATISTICS")
@@ -105,8 +119,9 @@ def print_summary_stats(df):
     
     print(f"\nGeneral data:")
     print(f"  Total options:      {len(df)}")
-    print(f"  Calls:              {len(df[df['option_type'] == 'call'])}")
-    print(f"  Puts:               {len(df[df['option_type'] == 'put'])}")
+    type_counts = df['option_type'].value_counts()
+    print(f"  Calls:              {type_counts.get('call', 0)}")
+    print(f"  Puts:               {type_counts.get('put', 0)}")
     
     print(f"\nImplied Volatility:")
     print(f"  Mean:      {df['mark_iv'].mean()*100:.2f}%")
@@ -136,18 +151,18 @@ def main():
     
     # Load data
     import glob
-    files = glob.glob('../deribit_data/*.parquet')
+    day_dirs = glob.glob('../deribit_data/currency=*/date=*')
     
-    if not files:
+    if not day_dirs:
         print("\nNo data to analyze!")
         print("Run basic_usage.py to collect data first")
         return
     
-    # Take latest file
-    latest_file = max(files, key=lambda x: x)
-    print(f"\nLoading: {latest_file}")
+    # Take latest day (partition directory of part files)
+    latest_dir = max(day_dirs, key=lambda x: os.path.basename(x))
+    print(f"\nLoading: {latest_dir}")
     
-    df = pd.read_parquet(latest_file)
+    df = load_columns(latest_dir, ['timestamp', 'instrument_name'])
     
     print(f"Records: {len(df):,}")
     print(f"Instruments: {df['instrument_name'].nunique()}")
@@ -157,17 +172,17 @@ def main():
     print(f"\n{'='*60}")
     print("1. Summary Statistics")
     print(f"{'='*60}")
-    print_summary_stats(df)
+    print_summary_stats(latest_dir)
     
     print(f"\n{'='*60}")
     print("2. Volatility Smile")
     print(f"{'='*60}")
-    analyze_volatility_smile(df)
+    analyze_volatility_smile(latest_dir)
     
     print(f"\n{'='*60}")
     print("3. Greeks Distribution")
     print(f"{'='*60}")
-    analyze_greeks_distribution(df)
+    analyze_greeks_distribution(latest_dir)
 
 
 if __name__ == "__main__":
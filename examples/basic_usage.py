@@ -1,7 +1,9 @@
 """
 Basic Usage Example
 
-Demonstrates simple usage of the Deribit options data collector
+Demonstrates simple usage of the Deribit options data collector.
+The top volume and ATM tables show how to query a saved Parquet file
+with DuckDB (optional: pip install duckdb).
 """
 
 import sys
@@ -10,6 +12,45 @@ sys.path.append('..')
 from collector import DeribitDataCollector
 import pandas as pd
 
+
+def print_saved_file_stats(filepath, underlying):
+    """Query top volume and ATM options from a saved Parquet file with DuckDB"""
+    
+    try:
+        import duckdb
+    except ImportError:
+        print("\nSkipping saved-file queries: DuckDB is not installed (pip install duckdb)")
+        return
+    
+    # Demonstrates querying a saved file: here the data is already in
+    # memory, but the same queries work on files that were never loaded
+    # into pandas. DuckDB reads only the needed columns and applies
+    # ORDER BY/LIMIT and WHERE during the scan
+    con = duckdb.connect()
+    
+    # Top 10 by volume
+    print(f"\nTop 10 options by 24h volume:")
+    top_volume = con.execute("""
+        SELECT instrument_name, mark_price, delta, mark_iv, volume_24h
+        FROM read_parquet(?)
+        ORDER BY volume_24h DESC NULLS LAST
+        LIMIT 10
+    """, [str(filepath)]).df()
+    print(top_volume.to_string(index=False))
+    
+    # ATM options
+    print(f"\nATM (At-The-Money) options:")
+    atm_options = con.execute("""
+        SELECT instrument_name, strike, mark_price, delta, mark_iv
+        FROM read_parquet(?)
+        WHERE strike BETWEEN ? AND ?
+        ORDER BY strike
+        LIMIT 10
+    """, [str(filepath), underlying * 0.95, underlying * 1.05]).df()
+    print(atm_options.to_string(index=False))
+    con.close()
+
+
 def main():
     print("="*60)
     print("Deribit Options Collector - Basic Example")
@@ -37,31 +78,16 @@ def main():
         print(f"Unique instruments:    {df['instrument_name'].nunique()}")
         print(f"Data completeness:     {(1 - df.isnull().sum().sum() / df.size) * 100:.1f}%")
         
-        # Top 10 by volume
-        print(f"\nTop 10 options by 24h volume:")
-        top_volume = df.nlargest(10, 'volume_24h')[
-            ['instrument_name', 'mark_price', 'delta', 'mark_iv', 'volume_24h']
-        ]
-        print(top_volume.to_string(index=False))
-        
-        # ATM options
-        print(f"\nATM (At-The-Money) options:")
-        underlying = df['underlying_price'].iloc[0]
-        atm_options = df[
-            (df['strike'] >= underlying * 0.95) & 
-            (df['strike'] <= underlying * 1.05)
-        ].sort_values('strike')[
-            ['instrument_name', 'strike', 'mark_price', 'delta', 'mark_iv']
-        ]
-        print(atm_options.head(10).to_string(index=False))
+        # Query the saved file
+        print_saved_file_stats(filepath, float(df['underlying_price'].iloc[0]))
         
         # Liquidity analysis
-        df_liquid = df[
+        liquid = (
             (df['bid_price'].notna()) & 
             (df['ask_price'].notna()) &
             (df['open_interest'] > 0)
-        ]
-        print(f"\nLiquid options: {len(df_liquid)} ({len(df_liquid)/len(df)*100:.1f}%)")
+        )
+        print(f"\nLiquid options: {liquid.sum()} ({liquid.mean()*100:.1f}%)")
         
         print(f"\n✓ Data saved: {filepath}")
         